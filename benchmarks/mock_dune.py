@@ -0,0 +1,253 @@
+"""
+Local stand-in for the parts of the Dune API the app uses.
+
+Serves execute, status, cancel, execution results and latest query results
+(both with simple `filters`) with configurable queue delay, run time,
+failure rate and synthetic result sizes, so the pipeline can be timed
+without an API key or network.
+"""
+import json
+import operator
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+POOL_TYPES = ['varchar', 'varchar', 'varchar', 'double', 'double', 'bigint', 'double', 'double',
+              'bigint', 'double', 'double', 'varchar', 'varchar', 'double', 'bigint', 'double',
+              'timestamp(3) with time zone', 'double', 'bigint']
+POOL_NAMES = ['pool_address', 'nft_contract_address', 'name', 'pool_fee_volume_eth', 'eth_balance',
+              'nft_balance', 'eth_volume', 'usd_volume', 'nfts_traded', 'spot_price', 'delta',
+              'bonding_curve', 'pool_type', 'initial_eth_balance', 'initial_nft_balance',
+              'initial_spot_price', 'creation_block_time', 'eth_change_trading', 'nft_change_trading']
+
+
+def address(rng):
+    return '0x' + '%040x' % rng.getrandbits(160)
+
+
+def pool_rows(n, seed=0):
+    """
+    Returns `n` synthetic rows shaped like the pools queries.
+    """
+
+    rng = random.Random(seed)
+    collections = [address(rng) for _ in range(max(1, n // 50))]
+    rows = []
+    for i in range(n):
+        curve = rng.choice(['linear', 'exponential'])
+        rows.append({
+            'pool_address': address(rng),
+            'nft_contract_address': rng.choice(collections),
+            'name': 'Collection %d' % (i % len(collections)),
+            'pool_fee_volume_eth': rng.random(),
+            'eth_balance': rng.random() * 10,
+            'nft_balance': rng.randint(0, 50),
+            'eth_volume': rng.random() * 100,
+            'usd_volume': rng.random() * 150000,
+            'nfts_traded': rng.randint(0, 200),
+            'spot_price': rng.random() * 2,
+            'delta': rng.random() * 0.05 if curve == 'linear' else 1 + rng.random() * 0.1,
+            'bonding_curve': curve,
+            'pool_type': rng.choice(['trade', 'nft', 'token']),
+            'initial_eth_balance': rng.random() * 10,
+            'initial_nft_balance': rng.randint(0, 50),
+            'initial_spot_price': rng.random() * 2,
+            'creation_block_time': '2022-%02d-%02d 12:00:00.000 UTC' % (rng.randint(7, 12), rng.randint(1, 28)),
+            'eth_change_trading': rng.normalvariate(0, 2),
+            'nft_change_trading': rng.randint(-20, 20),
+        })
+    return rows
+
+
+def earnings_rows(days, pool_addresses=None, seed=0):
+    """
+    Returns `days` synthetic daily fee rows, for each of `pool_addresses` in
+    long format if given.
+    """
+
+    rng = random.Random(seed)
+    start = time.mktime((2022, 7, 1, 0, 0, 0, 0, 0, 0))
+    rows = []
+    for pool in pool_addresses or [None]:
+        for d in range(days):
+            row = {
+                'day': time.strftime('%Y-%m-%d 00:00:00.000 UTC', time.gmtime(start + d * 86400)),
+                'daily_fees': rng.random() * 0.1,
+            }
+            if pool is not None:
+                row['pool_address'] = pool
+            rows.append(row)
+    return rows
+
+
+class MockDune:
+    """
+    State of the mock API. Results for each query ID come from
+    `results[query_id](params)` returning (column names, column types, rows).
+    """
+
+    def __init__(self, results, queue_delay=0.0, run_time=0.0, failure_rate=0.0, seed=0):
+        self.results = results
+        self.queue_delay = queue_delay
+        self.run_time = run_time
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.executions = {}
+        self.latest = {}
+        self.calls = {}
+        self.lock = threading.Lock()
+
+    def count(self, name):
+        with self.lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+
+    def execute(self, query_id, params):
+        execution_id = uuid.uuid4().hex
+        with self.lock:
+            failed = self.rng.random() < self.failure_rate
+            self.executions[execution_id] = {
+                'query_id': query_id, 'params': params, 'submitted': time.time(),
+                'failed': failed, 'cancelled': False,
+            }
+        return execution_id
+
+    def state(self, execution_id):
+        execution = self.executions[execution_id]
+        elapsed = time.time() - execution['submitted']
+        if execution['cancelled']:
+            return 'QUERY_STATE_CANCELLED'
+        if elapsed < self.queue_delay:
+            return 'QUERY_STATE_PENDING'
+        if elapsed < self.queue_delay + self.run_time:
+            return 'QUERY_STATE_EXECUTING'
+        if execution['failed']:
+            return 'QUERY_STATE_FAILED'
+        with self.lock:
+            self.latest[(execution['query_id'], json.dumps(execution['params'], sort_keys=True))] = execution_id
+        return 'QUERY_STATE_COMPLETED'
+
+    def status(self, execution_id):
+        execution = self.executions[execution_id]
+        submitted = execution['submitted']
+        started = submitted + self.queue_delay
+        body = {'execution_id': execution_id, 'query_id': execution['query_id'],
+                'state': self.state(execution_id), 'submitted_at': _iso(submitted)}
+        if time.time() >= started:
+            body['execution_started_at'] = _iso(started)
+        if body['state'] == 'QUERY_STATE_COMPLETED':
+            body['execution_ended_at'] = _iso(started + self.run_time)
+        return body
+
+    def page(self, execution_id, limit, offset, filters=None):
+        execution = self.executions[execution_id]
+        if 'columns' not in execution:
+            execution['columns'] = self.results[execution['query_id']](execution['params'])
+        names, types, rows = execution['columns']
+        if filters:
+            rows = filter_rows(rows, filters)
+        limit = limit or len(rows)
+        body = self.status(execution_id)
+        body['result'] = {
+            'rows': rows[offset:offset + limit],
+            'metadata': {'column_names': names, 'column_types': types, 'total_row_count': len(rows)},
+        }
+        if offset + limit < len(rows):
+            body['next_offset'] = offset + limit
+        return body
+
+
+FILTER = re.compile(r"^\s*(\w+)\s*(>=|<=|!=|=|>|<)\s*(?:'([^']*)'|([-\d.]+))\s*$")
+OPERATORS = {'>=': operator.ge, '<=': operator.le, '!=': operator.ne,
+             '=': operator.eq, '>': operator.gt, '<': operator.lt}
+
+
+def filter_rows(rows, filters):
+    """
+    Applies a single `column op value` filter such as "day >= '2022-09-01'",
+    the subset of the API's `filters` syntax the app sends. Strings compare
+    as strings, so ISO dates compare with the timestamp strings in rows.
+    """
+
+    match = FILTER.match(filters)
+    if match is None:
+        raise ValueError('unsupported filter: ' + filters)
+    column, op, text, number = match.groups()
+    value = text if text is not None else float(number)
+    compare = OPERATORS[op]
+    return [row for row in rows if row.get(column) is not None and compare(row[column], value)]
+
+
+def _iso(timestamp):
+    return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(timestamp)) + '.%06dZ' % int(timestamp % 1 * 1e6)
+
+
+def make_handler(mock):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def reply(self, status, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def route(self):
+            url = urlparse(self.path)
+            parts = url.path.strip('/').split('/')
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+            # /api/v1/<module>/<id>/<action>
+            return parts[-3], parts[-2], parts[-1], query
+
+        def do_POST(self):
+            module, ID, action, _ = self.route()
+            mock.count(module + '/' + action)
+            if module == 'query' and action == 'execute':
+                length = int(self.headers.get('Content-Length') or 0)
+                body = json.loads(self.rfile.read(length) or b'{}')
+                execution_id = mock.execute(ID, body.get('query_parameters', {}))
+                return self.reply(200, {'execution_id': execution_id, 'state': 'QUERY_STATE_PENDING'})
+            if module == 'execution' and action == 'cancel' and ID in mock.executions:
+                mock.executions[ID]['cancelled'] = True
+                return self.reply(200, {'success': True})
+            self.reply(404, {'error': 'not found'})
+
+        def do_GET(self):
+            module, ID, action, query = self.route()
+            mock.count(module + '/' + action)
+            limit = int(query['limit']) if 'limit' in query else None
+            offset = int(query.get('offset', 0))
+            filters = query.get('filters')
+            if module == 'execution' and ID in mock.executions:
+                if action == 'status':
+                    return self.reply(200, mock.status(ID))
+                if action == 'results':
+                    if mock.state(ID) != 'QUERY_STATE_COMPLETED':
+                        return self.reply(400, {'error': 'results not ready'})
+                    return self.reply(200, mock.page(ID, limit, offset, filters))
+            if module == 'query' and action == 'results':
+                params = {k[len('params.'):]: v for k, v in query.items() if k.startswith('params.')}
+                execution_id = mock.latest.get((ID, json.dumps(params, sort_keys=True)))
+                if execution_id is None:
+                    return self.reply(404, {'error': 'no results'})
+                return self.reply(200, mock.page(execution_id, limit, offset, filters))
+            self.reply(404, {'error': 'not found'})
+
+    return Handler
+
+
+def serve(mock, port=0):
+    """
+    Starts the mock API on a daemon thread.
+    Returns the server and its base URL, ready to pass to DuneClient.
+    """
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(mock))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, 'http://127.0.0.1:%d/api/v1/' % server.server_address[1]
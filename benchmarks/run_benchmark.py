@@ -0,0 +1,106 @@
+"""
+Times the full pipeline, from execute to the final pooltable/pooldetails and
+earnings frames, against the local mock Dune API.
+
+    python -m benchmarks.run_benchmark --pools 10 1000 100000 --days 1095
+"""
+import argparse
+import time
+from collections import defaultdict
+
+from benchmarks.mock_dune import POOL_NAMES, POOL_TYPES, MockDune, earnings_rows, pool_rows, serve
+from sudovision.cache import results_cache
+from sudovision.client import DuneClient
+from sudovision.pools import POOL_SCHEMA, PoolView, build_earnings
+from sudovision.queries import EARNINGS, OWNER_POOLS
+from sudovision.timing import trace
+
+POOLS_QUERY = OWNER_POOLS[0]
+EARNINGS_QUERY = EARNINGS[0]
+
+
+def run_once(client, params, address):
+    """
+    Runs one page view: the pools query, the derived frames and the
+    earnings of one pool.
+    Returns the seconds spent per stage and the trace counters.
+    """
+
+    results_cache.clear()
+    seconds = {}
+    with trace("benchmark") as timings:
+        start = time.perf_counter()
+        result = client.run_query(POOLS_QUERY, params, schema=POOL_SCHEMA)
+        seconds['pools_query'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        view = PoolView(result)
+        view.details(address)
+        seconds['pools_build'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        build_earnings(client.run_query(EARNINGS_QUERY, {"Pool Address": address}))
+        seconds['earnings'] = time.perf_counter() - start
+    for event in timings.events:
+        seconds[event['stage']] = seconds.get(event['stage'], 0.0) + event['seconds']
+    seconds['total'] = timings.total()
+    return seconds, timings.counters
+
+
+def benchmark(pool_count, days, repeats, queue_delay, run_time, failure_rate, page_size):
+    rows = pool_rows(pool_count)
+    mock = MockDune(
+        {
+            POOLS_QUERY: lambda params: (POOL_NAMES, POOL_TYPES, rows),
+            EARNINGS_QUERY: lambda params: (['day', 'daily_fees'], ['timestamp(3) with time zone', 'double'], earnings_rows(days)),
+        },
+        queue_delay=queue_delay, run_time=run_time, failure_rate=failure_rate,
+    )
+    server, base_url = serve(mock)
+    client = DuneClient("benchmark", base_url=base_url, max_result_age=0, page_size=page_size,
+                        rate_limit=10000, max_executions=8, retries=0)
+    totals = defaultdict(float)
+    counters = defaultdict(int)
+    failures = 0
+    try:
+        for i in range(repeats):
+            try:
+                seconds, counts = run_once(client, {"Creator Address": "0x%040x" % i}, rows[0]['pool_address'])
+            except Exception:
+                failures += 1
+                continue
+            for stage, value in seconds.items():
+                totals[stage] += value
+            for name, value in counts.items():
+                counters[name] += value
+    finally:
+        server.shutdown()
+    done = max(repeats - failures, 1)
+    return {stage: value / done for stage, value in totals.items()}, dict(counters), failures, dict(mock.calls)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pools', type=int, nargs='+', default=[10, 1000, 10000, 100000])
+    parser.add_argument('--days', type=int, default=365 * 3, help='days of earnings per pool')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--queue-delay', type=float, default=0.0, help='seconds an execution stays pending')
+    parser.add_argument('--run-time', type=float, default=0.0, help='seconds an execution stays executing')
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    parser.add_argument('--page-size', type=int, default=10000)
+    args = parser.parse_args()
+
+    for pool_count in args.pools:
+        means, counters, failures, calls = benchmark(
+            pool_count, args.days, args.repeats, args.queue_delay, args.run_time,
+            args.failure_rate, args.page_size,
+        )
+        print('pools=%d days=%d runs=%d failures=%d' % (pool_count, args.days, args.repeats, failures))
+        for stage, value in sorted(means.items(), key=lambda item: -item[1]):
+            print('  %-16s %9.4fs' % (stage, value))
+        print('  counters', counters)
+        print('  api calls', calls)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,5 @@
+import sys
+
+from sudovision.cli import main
+
+sys.exit(main())
@@ -0,0 +1,35 @@
+import asyncio
+
+
+class AsyncDuneClient:
+    """
+    Asyncio front end for a DuneClient.
+
+    Each query runs DuneClient.run_query in a worker thread on the wrapped
+    client's pooled session and scheduler, so many queries can be awaited
+    together while caching, coalescing, snapshots and timings behave exactly
+    as they do for the sync client.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    async def run_query(self, query_id, params, schema=None):
+        """
+        Takes in a query ID and its parameters.
+        Returns the result as a DataFrame, the same way DuneClient.run_query does.
+        """
+
+        return await asyncio.to_thread(self.client.run_query, query_id, params, schema=schema)
+
+    async def run_queries(self, queries):
+        """
+        Takes in a list of (query ID, parameters) pairs.
+        Runs them all concurrently.
+        Returns a list of result DataFrames, or the exception raised, in the same order.
+        """
+
+        return await asyncio.gather(
+            *(self.run_query(query_id, params) for query_id, params in queries),
+            return_exceptions=True,
+        )
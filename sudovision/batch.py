@@ -0,0 +1,68 @@
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+from sudovision.pools import POOL_SCHEMA, POOLDETAILS_COLUMNS, decode_addresses, get_pool_view
+from sudovision.rollups import SUMMARY_COLUMNS
+
+ADDRESS = re.compile(r'0x[0-9a-fA-F]{40}')
+
+
+def parse_addresses(text):
+    """
+    Takes in free text, e.g. a pasted list or an uploaded CSV.
+    Returns the unique addresses in it, lowercased, in order of appearance.
+    """
+
+    return list(dict.fromkeys(match.lower() for match in ADDRESS.findall(text)))
+
+
+def run_batch(client, query_id, param_name, addresses, max_workers=4):
+    """
+    Takes in a DuneClient, a pools query ID, its address parameter name and
+    a list of addresses.
+    Runs the query for every address on at most `max_workers` threads.
+    Yields (address, pools DataFrame or the exception raised) as each
+    lookup completes.
+    """
+
+    def lookup(address):
+        params = {param_name: address}
+        result = client.run_query(query_id, params, schema=POOL_SCHEMA)
+        view, _ = get_pool_view(query_id, params, result)
+        return view.pools
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="batch") as executor:
+        futures = {executor.submit(lookup, address): address for address in addresses}
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result()
+            except Exception as e:
+                yield futures[future], e
+
+
+def combine(pools_by_address):
+    """
+    Takes in a dict of looked up address to its pools DataFrame.
+    Returns one pools table with a `Lookup Address` column first.
+    """
+
+    frames = [
+        decode_addresses(pools[POOLDETAILS_COLUMNS]).assign(**{'Lookup Address': address})
+        for address, pools in pools_by_address.items() if not pools.empty
+    ]
+    if not frames:
+        return pd.DataFrame(columns=['Lookup Address'] + POOLDETAILS_COLUMNS)
+    combined = pd.concat(frames, ignore_index=True)
+    return combined[['Lookup Address'] + POOLDETAILS_COLUMNS]
+
+
+def summarize(combined):
+    """
+    Takes in the combined pools table.
+    Returns pool count, fees, volume, P&L and balance totals per looked up address.
+    """
+
+    summary = combined.groupby('Lookup Address', sort=False).agg(SUMMARY_COLUMNS)
+    return summary.rename(columns={'Pool Address': 'Pools'}).sort_values('Real Profit/Loss', ascending=False)
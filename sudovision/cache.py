@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+
+def make_key(query_id, params):
+    """
+    Takes in a query ID and a dict of query parameters.
+    Returns a hashable key that does not depend on parameter order.
+    """
+
+    return (str(query_id), json.dumps(params or {}, sort_keys=True))
+
+
+def write_atomic(target, write):
+    """
+    Takes in a file path and a function writing a file given its path.
+    Writes to a temporary file of this call's own next to `target`, then
+    moves it into place, so concurrent writers in any process never share
+    a temporary file and readers never see a partial one.
+    """
+
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target), suffix=".tmp")
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, target)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _pickle_to(value):
+    def write(path):
+        with open(path, "wb") as f:
+            pickle.dump(value, f)
+    return write
+
+
+class ResultCache:
+    """
+    In-process cache for completed Dune query results.
+
+    Entries are keyed by (query ID, parameters), expire after `ttl` seconds and
+    the least recently used entry is dropped once `maxsize` is reached. If
+    `path` is set, every entry is also pickled to that directory so results
+    survive an app restart.
+    """
+
+    def __init__(self, ttl=600, maxsize=256, path=None):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.path = path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if path:
+            os.makedirs(path, exist_ok=True)
+
+    def _file(self, key):
+        name = hashlib.sha1(repr(key).encode()).hexdigest()
+        return os.path.join(self.path, name + ".pkl")
+
+    def _expired(self, stored_at):
+        return self.ttl is not None and time.time() - stored_at > self.ttl
+
+    def _load(self, key):
+        try:
+            with open(self._file(key), "rb") as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def get(self, query_id, params):
+        """
+        Returns the cached value for this query and parameters, or None if
+        there is no fresh entry.
+        """
+
+        key = make_key(query_id, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self.path:
+                entry = self._load(key)
+                if entry is not None:
+                    self._entries[key] = entry
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if self._expired(stored_at):
+                self._discard(key)
+                return None
+            self._entries.move_to_end(key)
+            self._evict()
+            return value
+
+    def set(self, query_id, params, value):
+        """
+        Stores a value for this query and parameters.
+        """
+
+        key = make_key(query_id, params)
+        entry = (time.time(), value)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._evict()
+            if self.path:
+                write_atomic(self._file(key), _pickle_to(entry))
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self._discard(key)
+
+    def _discard(self, key):
+        self._entries.pop(key, None)
+        if self.path:
+            try:
+                os.remove(self._file(key))
+            except OSError:
+                pass
+
+    def _evict(self):
+        # only the in-memory copy is evicted, the disk copy stays until it expires
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# module level so it is shared by every session and page in the process
+results_cache = ResultCache(
+    ttl=int(os.environ.get("SUDOVISION_CACHE_TTL", 600)),
+    maxsize=int(os.environ.get("SUDOVISION_CACHE_SIZE", 256)),
+    path=os.environ.get("SUDOVISION_CACHE_DIR"),
+)
@@ -0,0 +1,152 @@
+"""
+Headless pool P&L and earnings reports for many owners or collections.
+
+    DUNE_API_KEY=... python -m sudovision owner 0xabc... 0xdef... --output reports/
+    DUNE_API_KEY=... python -m sudovision collection --file collections.txt --format parquet --earnings
+
+Addresses are split across worker processes, each with its own pooled
+client. Writes pools, totals and (with --earnings) daily earnings tables
+without importing Streamlit.
+"""
+import argparse
+import asyncio
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from sudovision.aio import AsyncDuneClient
+from sudovision.batch import combine, parse_addresses, summarize
+from sudovision.client import BASE_URL, get_client
+from sudovision.earnings import fetch_earnings_batch
+from sudovision.pools import POOL_SCHEMA, PoolView
+from sudovision.queries import COLLECTION_POOLS, EARNINGS, OWNER_POOLS
+
+QUERIES = {'owner': OWNER_POOLS, 'collection': COLLECTION_POOLS}
+
+
+def pool_earnings(client, pool_addresses, batch_query_id=None, batch_size=100):
+    """
+    Takes in a DuneClient and a list of pool addresses.
+    Returns (earnings, failed): the daily earnings of all of them in long
+    format with a `Pool Address` column, using the batched query when given
+    and concurrent single pool queries otherwise, and a list of
+    (pool address, error) for the pools whose query did not complete.
+    """
+
+    failed = []
+    if batch_query_id:
+        frames = {}
+        for i in range(0, len(pool_addresses), batch_size):
+            frames.update(fetch_earnings_batch(client, batch_query_id, pool_addresses[i:i + batch_size]))
+    else:
+        queries = [(EARNINGS[0], {EARNINGS[1]: address}) for address in pool_addresses]
+        results = asyncio.run(AsyncDuneClient(client).run_queries(queries))
+        frames = {}
+        for address, result in zip(pool_addresses, results):
+            if isinstance(result, Exception):
+                failed.append((address, result))
+            else:
+                frames[address] = result
+    long = [frame.assign(**{'Pool Address': address}) for address, frame in frames.items() if not frame.empty]
+    if not long:
+        return pd.DataFrame(columns=['Pool Address', 'day', 'daily_fees']), failed
+    return pd.concat(long, ignore_index=True)[['Pool Address', 'day', 'daily_fees']], failed
+
+
+def report(kind, address, settings, earnings=False, batch_query_id=None):
+    """
+    Runs in a worker process.
+    Takes in the report kind, one address and the client settings.
+    Returns (address, pools DataFrame, earnings DataFrame or None, list of
+    (pool address, error) for pools whose earnings could not be fetched).
+    """
+
+    query_id, param_name = QUERIES[kind]
+    client = get_client(**settings)
+    view = PoolView(client.run_query(query_id, {param_name: address}, schema=POOL_SCHEMA))
+    pool_earnings_frame, earnings_failed = None, []
+    if earnings and not view.pools.empty:
+        pool_earnings_frame, earnings_failed = pool_earnings(client, view.by_volume, batch_query_id)
+    return address, view.pools, pool_earnings_frame, earnings_failed
+
+
+def write(frame, path, fmt):
+    if fmt == 'parquet':
+        frame.to_parquet(path + '.parquet', index=False)
+    else:
+        frame.to_csv(path + '.csv', index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m sudovision', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('kind', choices=sorted(QUERIES), help='look up pools by owner or by NFT collection')
+    parser.add_argument('addresses', nargs='*', help='addresses to report on')
+    parser.add_argument('--file', help='file of addresses, any text or CSV layout')
+    parser.add_argument('--output', default='.', help='directory to write the reports to')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='worker processes')
+    parser.add_argument('--earnings', action='store_true', help='also fetch daily earnings of every pool')
+    parser.add_argument('--earnings-batch-query', help='ID of a query taking comma separated "Pool Addresses"')
+    parser.add_argument('--max-result-age', type=int, default=900)
+    parser.add_argument('--snapshot-dir', help='directory of the Arrow snapshot store')
+    parser.add_argument('--rate-limit', type=float, default=5.0,
+                        help='Dune API calls per second, shared by all workers')
+    parser.add_argument('--max-executions', type=int, default=3,
+                        help='concurrent Dune executions, shared by all workers (also caps --workers)')
+    args = parser.parse_args(argv)
+
+    api_key = os.environ.get('DUNE_API_KEY')
+    if not api_key:
+        parser.error('set DUNE_API_KEY')
+    text = ' '.join(args.addresses)
+    if args.file:
+        with open(args.file) as f:
+            text += '\n' + f.read()
+    addresses = parse_addresses(text)
+    if not addresses:
+        parser.error('no addresses given')
+
+    # every worker has its own client and scheduler, so the limits are split between them
+    workers = max(1, min(args.workers, len(addresses), args.max_executions))
+    settings = {
+        'api_key': api_key,
+        'base_url': os.environ.get('DUNE_BASE_URL', BASE_URL),
+        'max_result_age': args.max_result_age,
+        'snapshot_dir': args.snapshot_dir,
+        'rate_limit': args.rate_limit / workers,
+        'max_executions': max(1, args.max_executions // workers),
+    }
+    pools_by_address = {}
+    earnings = []
+    failed = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(report, args.kind, address, settings, args.earnings, args.earnings_batch_query): address
+            for address in addresses
+        }
+        for future in as_completed(futures):
+            try:
+                address, pools, pool_earnings_frame, earnings_failed = future.result()
+            except Exception as e:
+                failed += 1
+                print('failed %s: %s' % (futures[future], e), file=sys.stderr)
+                continue
+            pools_by_address[address] = pools
+            if pool_earnings_frame is not None:
+                earnings.append(pool_earnings_frame.assign(**{'Lookup Address': address}))
+            for pool, e in earnings_failed:
+                failed += 1
+                print('failed earnings of %s (%s): %s' % (pool, address, e), file=sys.stderr)
+            print('done %s: %d pools' % (address, len(pools)), file=sys.stderr)
+
+    os.makedirs(args.output, exist_ok=True)
+    combined = combine(pools_by_address)
+    write(combined, os.path.join(args.output, 'pools'), args.format)
+    write(summarize(combined).reset_index(), os.path.join(args.output, 'totals'), args.format)
+    if args.earnings:
+        write(pd.concat(earnings, ignore_index=True) if earnings else pd.DataFrame(),
+              os.path.join(args.output, 'earnings'), args.format)
+    return 1 if failed else 0
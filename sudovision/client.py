@@ -0,0 +1,355 @@
+import json
+import threading
+
+import pandas as pd
+from requests import Session
+from requests.exceptions import ConnectionError, Timeout
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from sudovision.cache import make_key, results_cache
+from sudovision.polling import wait_for_execution
+from sudovision.results import apply_schema, read_pages
+from sudovision.scheduler import Scheduler
+from sudovision.singleflight import inflight
+from sudovision.store import SnapshotStore
+from sudovision.timing import count, record, stage
+
+BASE_URL = "https://api.dune.com/api/v1/"
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# a gateway error or read timeout can come back after Dune already queued the
+# execution, only a 429 means an execute/cancel call was surely not accepted
+POST_RETRY_STATUSES = (429,)
+
+
+def make_session(pool_size=10, retries=3, backoff_factor=0.5, statuses=RETRY_STATUSES, method="GET"):
+    """
+    Creates a requests session that keeps connections to the API alive and
+    retries `method` calls on connection errors and `statuses` with backoff.
+    Read timeouts are only retried for GET.
+    """
+
+    retry = Retry(
+        total=retries,
+        read=retries if method == "GET" else 0,
+        backoff_factor=backoff_factor,
+        status_forcelist=statuses,
+        allowed_methods=frozenset([method]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class DuneClient:
+    """
+    Thin wrapper around the Dune API that shares one pooled session between
+    every call, page and Streamlit session in the process.
+
+    `max_result_age` is how many seconds old the latest result of a query may
+    be before a new execution is started (0 always executes) and
+    `query_timeout` is how long an execution may run before it is cancelled.
+    Results are downloaded `page_size` rows at a time. With a `snapshot_dir`
+    every result is also kept in a SnapshotStore, which is read before the
+    API and used when the API cannot be reached. API calls are paced by a
+    Scheduler allowing `rate_limit` calls per second and `max_executions`
+    concurrent executions.
+    """
+
+    def __init__(self, api_key, base_url=BASE_URL, pool_size=10, retries=3,
+                 connect_timeout=5, read_timeout=30, max_result_age=900, query_timeout=300,
+                 page_size=10000, snapshot_dir=None, rate_limit=5.0, max_executions=3):
+        self.base_url = base_url
+        self.header = {"x-dune-api-key": api_key}
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_result_age = max_result_age
+        self.query_timeout = query_timeout
+        self.page_size = page_size
+        self.store = SnapshotStore(snapshot_dir) if snapshot_dir else None
+        self.scheduler = Scheduler(rate=rate_limit, burst=max(1, int(rate_limit * 2)), max_executions=max_executions)
+        self.session = make_session(pool_size=pool_size, retries=retries)
+        self.post_session = make_session(pool_size=pool_size, retries=retries,
+                                         statuses=POST_RETRY_STATUSES, method="POST")
+
+    def make_api_url(self, module, action, ID):
+        """
+        We shall use this function to generate a URL to call the API.
+        """
+
+        url = self.base_url + module + "/" + ID + "/" + action
+
+        return url
+
+    def get(self, url, **kwargs):
+        self.scheduler.request()
+        return self.session.get(url, headers=self.header, timeout=self.timeout, **kwargs)
+
+    def post(self, url, **kwargs):
+        self.scheduler.request()
+        return self.post_session.post(url, headers=self.header, timeout=self.timeout, **kwargs)
+
+    def execute_query(self, query_id, params):
+        """
+        Takes in the query ID and its parameters.
+        Calls the API to execute the query.
+        Returns the execution ID of the instance which is executing the query.
+        """
+
+        url = self.make_api_url("query", "execute", query_id)
+        datas = {"query_parameters": params}
+        with stage("execute", query_id=query_id):
+            response = self.post(url, data=json.dumps(datas))
+        response.raise_for_status()
+
+        execution_id = response.json()['execution_id']
+
+        return execution_id
+
+    def get_query_status(self, execution_id):
+        """
+        Takes in an execution ID.
+        Fetches the status of query execution using the API
+        Returns the status response object
+        """
+
+        url = self.make_api_url("execution", "status", execution_id)
+        response = self.get(url)
+
+        return response
+
+    def get_query_results(self, execution_id, limit=None, offset=None, filters=None):
+        """
+        Takes in an execution ID and optionally the page of rows to fetch and
+        a filter expression such as "day >= '2022-09-01'".
+        Fetches the results returned from the query using the API
+        Returns the results response object
+        """
+
+        url = self.make_api_url("execution", "results", execution_id)
+        query = _page_params(limit, offset)
+        if filters:
+            query["filters"] = filters
+        response = self.get(url, params=query)
+
+        return response
+
+    def cancel_execution(self, execution_id):
+        """
+        Takes in an execution ID.
+        Asks the API to cancel the execution
+        Returns the cancel response object
+        """
+
+        url = self.make_api_url("execution", "cancel", execution_id)
+        response = self.post(url)
+
+        return response
+
+    def get_latest_result(self, query_id, params, limit=None):
+        """
+        Takes in a query ID, its parameters and optionally how many rows to fetch.
+        Fetches the latest result of the query for these parameters without executing it
+        Returns the results response object
+        """
+
+        url = self.make_api_url("query", "results", query_id)
+        query = {"params." + k: v for k, v in params.items()}
+        query.update(_page_params(limit, None))
+        response = self.get(url, params=query)
+
+        return response
+
+    def wait_for(self, execution_id):
+        """
+        Takes in an execution ID.
+        Waits for the execution to finish, cancelling it after query_timeout seconds
+        Returns the number of status polls made
+        """
+
+        last = {}
+
+        def state():
+            response = self.get_query_status(execution_id)
+            response.raise_for_status()
+            last.update(response.json())
+            return last['state']
+
+        with stage("poll", execution_id=execution_id) as fields:
+            polls = wait_for_execution(state, cancel=lambda: self.cancel_execution(execution_id), timeout=self.query_timeout)
+            fields["polls"] = polls
+        count("status_polls", polls)
+        record_dune_times(last)
+        return polls
+
+    def results_frame(self, execution_id, first_page=None, filters=None):
+        """
+        Takes in an execution ID and optionally its already fetched first page
+        or a filter expression applied by the API.
+        Pages through the results, parsing each page into a typed DataFrame
+        Returns the DataFrame
+        """
+
+        def fetch_page(offset, limit):
+            if offset == 0 and first_page is not None:
+                return first_page
+            with stage("download", execution_id=execution_id, offset=offset) as fields:
+                response = self.get_query_results(execution_id, limit=limit, offset=offset, filters=filters)
+                response.raise_for_status()
+                fields["bytes"] = len(response.content)
+            count("bytes_downloaded", fields["bytes"])
+            with stage("json_parse", execution_id=execution_id, offset=offset):
+                return response.json()
+
+        frame, _ = read_pages(fetch_page, self.page_size)
+        return frame
+
+    def fresh_frame(self, query_id, params):
+        """
+        Takes in a query ID and its parameters.
+        Returns the latest completed result as a DataFrame if it finished less
+        than max_result_age seconds ago, otherwise None.
+        """
+
+        if not self.max_result_age:
+            return None
+        if self.store is not None:
+            snapshot = self.store.latest(query_id, params)
+            if snapshot is not None and _age(snapshot[1]) <= self.max_result_age:
+                count("snapshot_hits")
+                return self.store.load(query_id, params, snapshot[0])
+        latest = self.fresh_latest(query_id, params, limit=self.page_size)
+        if latest is None:
+            return None
+        execution_id = latest['execution_id']
+        frame = self.store.load(query_id, params, execution_id) if self.store is not None else None
+        if frame is None:
+            frame = self.results_frame(execution_id, first_page=latest)
+        self.snapshot(query_id, params, execution_id, frame, latest['execution_ended_at'])
+        return frame
+
+    def fresh_latest(self, query_id, params, limit):
+        """
+        Takes in a query ID, its parameters and how many rows to fetch.
+        Returns the latest result response JSON if it completed less than
+        max_result_age seconds ago, otherwise None.
+        """
+
+        if not self.max_result_age:
+            return None
+        response = self.get_latest_result(query_id, params, limit=limit)
+        if response.status_code != 200:
+            return None
+        latest = response.json()
+        if latest.get('state') != 'QUERY_STATE_COMPLETED' or not latest.get('execution_ended_at'):
+            return None
+        if _age(latest['execution_ended_at']) > self.max_result_age:
+            return None
+        return latest
+
+    def current_execution(self, query_id, params):
+        """
+        Takes in a query ID and its parameters.
+        Returns the ID of a completed execution that is recent enough, reusing
+        the latest one when possible and executing the query otherwise, without
+        downloading its results.
+        """
+
+        latest = self.fresh_latest(query_id, params, limit=1)
+        if latest is not None:
+            return latest['execution_id']
+        with self.scheduler.execution():
+            execution_id = self.execute_query(query_id, params)
+            self.wait_for(execution_id)
+        return execution_id
+
+    def snapshot(self, query_id, params, execution_id, frame, ended_at=None):
+        """
+        Saves a result to the snapshot store, if there is one.
+        """
+
+        if self.store is not None:
+            self.store.save(query_id, params, execution_id, frame, ended_at)
+
+    def run_query(self, query_id, params, cache=True, schema=None):
+        """
+        Takes in a query ID and its parameters.
+        Returns the result as a DataFrame, served from the results cache or the
+        latest Dune execution when either is recent enough, executing the query
+        otherwise. With cache=False the result is not kept in the results cache.
+        A `schema` of column dtypes is applied before the result is cached.
+        Concurrent calls for the same query and parameters share one execution.
+        """
+
+        frame = results_cache.get(query_id, params) if cache else None
+        if frame is not None:
+            count("cache_hits")
+            return frame
+        count("cache_misses")
+        return inflight.do(make_key(query_id, params), lambda: self._fetch(query_id, params, cache, schema))
+
+    def _fetch(self, query_id, params, cache, schema):
+        try:
+            frame = self.fresh_frame(query_id, params)
+            if frame is None:
+                with self.scheduler.execution():
+                    execution_id = self.execute_query(query_id, params)
+                    self.wait_for(execution_id)
+                frame = self.results_frame(execution_id)
+                self.snapshot(query_id, params, execution_id, frame)
+        except (ConnectionError, Timeout):
+            # offline, fall back to the newest snapshot however old it is
+            frame = self.store.load(query_id, params) if self.store is not None else None
+            if frame is None:
+                raise
+        if schema:
+            frame = apply_schema(frame, schema)
+        if cache:
+            results_cache.set(query_id, params, frame)
+        return frame
+
+
+def record_dune_times(status):
+    """
+    Takes in the final status JSON of an execution.
+    Records how long it queued and ran on Dune's side, when the timestamps are there.
+    """
+
+    submitted, started, ended = (status.get(k) for k in ('submitted_at', 'execution_started_at', 'execution_ended_at'))
+    if submitted and started:
+        record("dune_queue", (pd.Timestamp(started) - pd.Timestamp(submitted)).total_seconds())
+    if started and ended:
+        record("dune_execution", (pd.Timestamp(ended) - pd.Timestamp(started)).total_seconds())
+
+
+def _age(ended_at):
+    return (pd.Timestamp.now(tz='UTC') - pd.Timestamp(ended_at)).total_seconds()
+
+
+def _page_params(limit, offset):
+    page = {}
+    if limit is not None:
+        page["limit"] = limit
+    if offset is not None:
+        page["offset"] = offset
+    return page
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(api_key, **settings):
+    """
+    Returns the process wide DuneClient for this API key and settings, so that
+    Streamlit reruns keep reusing the same connection pool.
+    """
+
+    key = (api_key, tuple(sorted(settings.items())))
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = DuneClient(api_key, **settings)
+        return _clients[key]
@@ -0,0 +1,134 @@
+"""
+Daily pool earnings, fetched one pool per execution with the earnings query
+or many pools per execution with a batched earnings query.
+
+When the client has a snapshot store, single pool series are updated
+incrementally: only days from the last stored day onwards are downloaded
+and merged into the stored series.
+
+The batched query takes a single text parameter, "Pool Addresses", holding a
+comma separated list of pool addresses, and returns the same `day` and
+`daily_fees` columns as the single pool query plus a `pool_address` column.
+"""
+from functools import partial
+
+import pandas as pd
+from requests.exceptions import ConnectionError, Timeout
+
+from sudovision.cache import make_key, results_cache
+from sudovision.singleflight import inflight
+
+EARNINGS_COLUMNS = ['day', 'daily_fees']
+
+
+def split_by_pool(long, addresses):
+    """
+    Takes in the long format result of the batched earnings query and the pool
+    addresses it was run for.
+    Returns a dict of pool address to that pool's earnings DataFrame. Pools
+    without any rows get an empty frame.
+    """
+
+    if long.empty:
+        long = pd.DataFrame(columns=['pool_address'] + EARNINGS_COLUMNS)
+    long = long.assign(pool_address=long['pool_address'].str.lower())
+    groups = dict(tuple(long.groupby('pool_address', sort=False)))
+    empty = pd.DataFrame(columns=EARNINGS_COLUMNS)
+    return {
+        address: groups[address.lower()][EARNINGS_COLUMNS].reset_index(drop=True)
+        if address.lower() in groups else empty
+        for address in addresses
+    }
+
+
+def fetch_earnings_batch(client, batch_query_id, addresses):
+    """
+    Takes in a DuneClient, the batched earnings query ID and a list of pool addresses.
+    Runs one execution for all of them.
+    Returns a dict of pool address to earnings DataFrame.
+    """
+
+    long = client.run_query(batch_query_id, {"Pool Addresses": ",".join(addresses)}, cache=False)
+    return split_by_pool(long, addresses)
+
+
+def warm_earnings_cache(client, batch_query_id, earnings_query_id, param_list):
+    """
+    Runs the batched earnings query for a list of single pool parameter dicts
+    and stores each pool's frame under the single pool earnings query, so that
+    later single pool lookups are cache hits.
+    """
+
+    addresses = [params["Pool Address"] for params in param_list]
+    for address, frame in fetch_earnings_batch(client, batch_query_id, addresses).items():
+        results_cache.set(earnings_query_id, {"Pool Address": address}, frame)
+
+
+def update_earnings(client, query_id, params):
+    """
+    Takes in a DuneClient, the earnings query ID and a pool's parameters.
+    Returns the pool's earnings DataFrame. If a snapshot of the pool exists,
+    only rows from its last stored day onwards are fetched from a current
+    execution and merged in, otherwise the whole history is fetched.
+    """
+
+    frame = results_cache.get(query_id, params)
+    if frame is not None:
+        return frame
+    # its own key, run_query below claims the plain one
+    key = ("update",) + make_key(query_id, params)
+    return inflight.do(key, lambda: _update_earnings(client, query_id, params))
+
+
+def _update_earnings(client, query_id, params):
+    snapshot = client.store.latest(query_id, params) if client.store is not None else None
+    stored = client.store.load(query_id, params, snapshot[0]) if snapshot is not None else None
+    if stored is None or stored.empty:
+        return client.run_query(query_id, params)
+
+    age = (pd.Timestamp.now(tz='UTC') - snapshot[1]).total_seconds()
+    if age > client.max_result_age:
+        try:
+            execution_id = client.current_execution(query_id, params)
+        except (ConnectionError, Timeout):
+            execution_id = snapshot[0]  # offline, serve the stored series
+        if execution_id != snapshot[0]:
+            # the last stored day may have been partial, so it is fetched again
+            last_day = stored['day'].max()
+            new = client.results_frame(execution_id, filters="day >= '%s'" % str(last_day)[:10])
+            stored = pd.concat([stored[stored['day'] < last_day], new], ignore_index=True)
+            # in case the filter was not applied and the whole history came back
+            stored = stored.drop_duplicates('day', keep='last').sort_values('day', ignore_index=True)
+            client.snapshot(query_id, params, execution_id, stored)
+    results_cache.set(query_id, params, stored)
+    return stored
+
+
+def fetch_earnings(prefetcher, client, query_id, address):
+    """
+    Takes in the prefetcher, a DuneClient, the earnings query ID and a pool address.
+    Returns the pool's earnings DataFrame, waiting on a running prefetch if
+    there is one.
+    """
+
+    return prefetcher.result(client, query_id, {"Pool Address": address}, run=partial(update_earnings, client))
+
+
+def prefetch_earnings(prefetcher, client, earnings_query_id, addresses, batch_query_id=None, batch_size=100,
+                      limit=None):
+    """
+    Queues earnings for the addresses on the prefetcher, busiest first. With a
+    batched query ID, every address is fetched `batch_size` pools per
+    execution. Otherwise each pool costs an execution, so only the first
+    `limit` addresses are queued (all of them if limit is None).
+    """
+
+    param_list = [{"Pool Address": address} for address in addresses]
+    if not batch_query_id:
+        if limit is not None:
+            param_list = param_list[:limit]
+        prefetcher.submit_all(client, earnings_query_id, param_list, run=partial(update_earnings, client))
+        return
+    warm = partial(warm_earnings_cache, client, batch_query_id, earnings_query_id)
+    for i in range(0, len(param_list), batch_size):
+        prefetcher.submit_group(earnings_query_id, param_list[i:i + batch_size], warm)
@@ -0,0 +1,347 @@
+import streamlit as st
+from st_aggrid import AgGrid, GridOptionsBuilder
+from st_aggrid.shared import GridUpdateMode
+import pandas as pd
+from requests import RequestException
+
+from sudovision.batch import combine, parse_addresses, run_batch, summarize
+from sudovision.client import BASE_URL, get_client
+from sudovision.earnings import fetch_earnings, prefetch_earnings
+from sudovision.paging import page_frame
+from sudovision.polling import QueryFailed, QueryTimeout
+from sudovision.pools import POOL_SCHEMA, build_earnings, decode_addresses, get_pool_view
+from sudovision.prefetch import get_prefetcher
+from sudovision.queries import EARNINGS
+from sudovision.timing import recent, stage, trace
+
+EARNINGS_QUERY = EARNINGS[0]
+
+
+def dune_from_secrets():
+    """
+    Returns the shared DuneClient configured from st.secrets.
+    """
+
+    return get_client(
+        st.secrets["API_KEY"],
+        base_url=st.secrets.get("DUNE_BASE_URL", BASE_URL),
+        pool_size=int(st.secrets.get("HTTP_POOL_SIZE", 10)),
+        read_timeout=int(st.secrets.get("HTTP_TIMEOUT", 30)),
+        # latest results younger than this many seconds are reused instead of re-executing, 0 disables
+        max_result_age=int(st.secrets.get("MAX_RESULT_AGE", 900)),
+        # executions still running after this many seconds are cancelled
+        query_timeout=int(st.secrets.get("QUERY_TIMEOUT", 300)),
+        page_size=int(st.secrets.get("RESULT_PAGE_SIZE", 10000)),
+        # directory for Arrow snapshots of every result, shared by all app processes
+        snapshot_dir=st.secrets.get("SNAPSHOT_DIR"),
+        # Dune API calls per second and concurrent executions across the whole process
+        rate_limit=float(st.secrets.get("RATE_LIMIT", 5)),
+        max_executions=int(st.secrets.get("MAX_EXECUTIONS", 3)),
+    )
+
+
+def aggrid_interactive_table(df: pd.DataFrame, height=200, enterprise=True):
+    """Creates an st-aggrid interactive table based on a dataframe.
+
+    Args:
+        df (pd.DataFrame]): Source dataframe
+        height (int): Height of the grid in pixels
+        enterprise (bool): Enable row grouping, pivoting and the side bar
+
+    Returns:
+        dict: The selected row
+    """
+    if enterprise:
+        options = GridOptionsBuilder.from_dataframe(
+            df, enableRowGroup=True, enableValue=True, enablePivot=True
+        )
+        options.configure_side_bar()
+    else:
+        options = GridOptionsBuilder.from_dataframe(df)
+
+    options.configure_selection("single")
+    selection = AgGrid(
+        df,
+        enable_enterprise_modules=enterprise,
+        gridOptions=options.build(),
+        theme="streamlit",
+        height=height,
+        update_mode=GridUpdateMode.MODEL_CHANGED,
+        allow_unsafe_jscode=True,
+    )
+
+    return selection
+
+
+def paged_table(df: pd.DataFrame, height=200, page_size=100):
+    """Shows one page of a large dataframe in an st-aggrid table.
+
+    Searching, sorting and paging happen on the pandas frame in the app, so
+    the browser only receives `page_size` rows however large `df` is.
+
+    Returns:
+        dict: The selected row
+    """
+    search, sort, direction, page = st.columns([3, 2, 1, 1])
+    text = search.text_input('Search pools', '')
+    sort_by = sort.selectbox('Sort by', list(df.columns), index=list(df.columns).index('Trading Volume (ETH)'))
+    ascending = direction.selectbox('Order', ['Descending', 'Ascending']) == 'Ascending'
+    number = page.number_input('Page', min_value=1, value=1, step=1)
+
+    shown, total, pages = page_frame(df, int(number), page_size, sort_by, ascending, text)
+    st.caption('Showing %d of %d matching pools, page %d of %d' % (len(shown), total, min(int(number), pages), pages))
+
+    return aggrid_interactive_table(decode_addresses(shown), height=height, enterprise=False)
+
+
+def show_pool_stats(stats):
+    """
+    Takes in the pooldetails row of the selected pool, index reset.
+    Writes the pool specific stats.
+    """
+
+    if stats['Pool Type'][0] == 'trade':
+        st.write('**Name:** '+ str(stats['Name'][0]))
+        st.write('**Pool Address:** '+ str(stats['Pool Address'][0]))
+        st.write(' ')
+        st.write('**Real Profit/Loss (ETH):** '+ str("{:.2f}".format(stats['Real Profit/Loss'][0])))
+        st.write('*-> Real Profit/Loss = Current Inventory Value - Inventory Value if Held*')
+        st.write('*-> Current Inventory Value includes ETH/NFTs that were manually withdrawn*')
+        st.write('*-> Inventory Value if Held includes ETH/NFTs that were manually added after pool creation*')
+        st.write(' ')
+        st.write('**Impermanent Loss (ETH):** '+ str("{:.2f}".format(stats['Impermanent Loss'][0])))
+        st.write('*-> Impermanent Loss = Current Inventory Value - Inventory Value if Held - Fees Earned*')
+        st.write('*-> (+ve is good, -ve is bad)*')
+        st.write(' ')
+        st.write('**LP Fees Earned (ETH):** '+ str("{:.2f}".format(stats['LP Fees Earned (ETH)'][0])))
+        st.write('**Trading Volume (ETH):** '+ str("{:.2f}".format(stats['Trading Volume (ETH)'][0])))
+        st.write(' ')
+        st.write('**ETH Balance:** '+ str("{:.2f}".format(stats['ETH Balance'][0])))
+        st.write('**NFT Balance:** '+ str(stats['NFT Balance'][0]))
+        st.write('**Spot Price:** '+ str("{:.2f}".format(stats['Spot Price'][0])))
+        st.write(' ')
+        st.write('**Manual Inventory Change (ETH):** '+ str("{:.2f}".format(stats['Manual Inventory Change (ETH)'][0])))
+        st.write('**Manual Inventory Change (NFTs):** '+ str(stats['Manual Inventory Change (NFTs)'][0]))
+        st.write(' ')
+        st.write('**Inventory Change By Trading (ETH):** '+ str("{:.2f}".format(stats['Inventory Change By Trading (ETH)'][0])))
+        st.write('**Inventory Change By Trading (NFTs):** '+ str(stats['Inventory Change By Trading (NFTs)'][0]))
+        st.write(' ')
+        st.write('**Initial ETH:** '+ str("{:.2f}".format(stats['Initial ETH'][0])))
+        st.write('**Initial NFTs:** '+ str(stats['Initial NFTs'][0]))
+        st.write('**Initial Spot Price:** '+ str("{:.2f}".format(stats['Initial Spot Price'][0])))
+        st.write(' ')
+        st.write('**Age:** '+ str(stats['Age'][0]))
+        st.write(' ')
+        st.write('**Assumptions:**')
+        st.write('- Value of NFTs in inventory is what you would get selling them into the pool one at a time, starting at the Current Spot Price and lowering it by Delta along the Bonding Curve after each sale. Pool fees are ignored.')
+    else:
+        st.write('**Name:** '+ stats['Name'][0]) #NOTE
+        st.write('**Pool Address:** '+ str(stats['Pool Address'][0]))
+        st.write(' ')
+        st.write('**LP Fees Earned (ETH):** '+ str("{:.2f}".format(stats['LP Fees Earned (ETH)'][0])))
+        st.write('**Trading Volume (ETH):** '+ str("{:.2f}".format(stats['Trading Volume (ETH)'][0])))
+        st.write(' ')
+        st.write('**ETH Balance:** '+ str("{:.2f}".format(stats['ETH Balance'][0])))
+        st.write('**NFT Balance:** '+ str(stats['NFT Balance'][0]))
+        st.write('**Spot Price:** '+ str("{:.2f}".format(stats['Spot Price'][0])))
+        st.write(' ')
+        st.write('**Manual Inventory Change (ETH):** '+ str("{:.2f}".format(stats['Manual Inventory Change (ETH)'][0])))
+        st.write('**Manual Inventory Change (NFTs):** '+ str(stats['Manual Inventory Change (NFTs)'][0]))
+        st.write(' ')
+        st.write('**Inventory Change By Trading (ETH):** '+ str("{:.2f}".format(stats['Inventory Change By Trading (ETH)'][0])))
+        st.write('**Inventory Change By Trading (NFTs):** '+ str(stats['Inventory Change By Trading (NFTs)'][0]))
+        st.write(' ')
+        st.write('**Initial ETH:** '+ str("{:.2f}".format(stats['Initial ETH'][0])))
+        st.write('**Initial NFTs:** '+ str(stats['Initial NFTs'][0]))
+        st.write('**Initial Spot Price:** '+ str("{:.2f}".format(stats['Initial Spot Price'][0])))
+        st.write(' ')
+        st.write('**Age:** '+ str(stats['Age'][0]))
+
+
+def show_rollups(rollups):
+    """
+    Takes in the rollups of a PoolView.
+    Writes the totals across all pools, the totals by bonding curve and by
+    pool type and the top pools.
+    """
+
+    totals = rollups['totals']
+    st.write('**All Pools**')
+    pools, fees, volume, pnl = st.columns(4)
+    pools.metric('Pools', int(totals['Pools']))
+    fees.metric('LP Fees Earned (ETH)', "{:.2f}".format(totals['LP Fees Earned (ETH)']))
+    volume.metric('Trading Volume (ETH)', "{:.2f}".format(totals['Trading Volume (ETH)']))
+    pnl.metric('Real Profit/Loss (ETH)', "{:.2f}".format(totals['Real Profit/Loss']))
+
+    by_curve, by_type = st.columns(2)
+    by_curve.write('**By Bonding Curve**')
+    by_curve.dataframe(rollups['by_curve'])
+    by_type.write('**By Pool Type**')
+    by_type.dataframe(rollups['by_type'])
+
+    st.write('**Top Pools By LP Fees**')
+    st.dataframe(rollups['top_pools'])
+
+
+def render_page(pools_query, param_name, prompt, label, default_address, grid_height=200, rollups=False):
+    """
+    Renders a pool analysis page.
+
+    Takes in the ID of the pools query, the name of its address parameter,
+    the prompt and input label shown above the address box, the default
+    address and the height of the pools grid. With rollups=True the totals
+    across all pools are shown above the grid.
+    """
+
+    st.set_page_config(
+        page_title="Sudoswap.Vision",
+        page_icon="✨",
+        layout="wide",
+    )
+
+    st.title('SudoSwap Pool Analysis')
+    st.markdown("[By Kofi](https://twitter.com/0xKofi)")
+
+    dune = dune_from_secrets()
+    batch = st.sidebar.radio('Mode', ['Single address', 'Batch']) == 'Batch'
+    show_timings = st.sidebar.checkbox('Show timings', value=bool(st.secrets.get("SHOW_TIMINGS", False)))
+
+    if not batch:
+        st.write(prompt)
+        owner = st.text_input(label, default_address)
+
+    with trace(pools_query) as timings:
+        try:
+            if batch:
+                render_batch(dune, pools_query, param_name, label)
+            else:
+                render_pools(dune, pools_query, {param_name: owner}, grid_height, rollups)
+        finally:
+            if show_timings:
+                timing_panel(timings, dune)
+
+
+def render_pools(dune, pools_query, params, grid_height, rollups=False):
+    """
+    Renders the pools grid and the stats of the selected pool, after the
+    rollups across all pools if asked for.
+    """
+
+    # earnings of every pool in the grid are fetched in the background by this many workers
+    prefetcher = get_prefetcher(max_workers=int(st.secrets.get("PREFETCH_WORKERS", 4)))
+
+    try:
+        with stage("pools_query", query_id=pools_query):
+            result = dune.run_query(pools_query, params, schema=POOL_SCHEMA)
+        with stage("pools_build", rows=len(result)) as fields:
+            view, built = get_pool_view(pools_query, params, result)
+            fields["built"] = built
+    except (QueryFailed, QueryTimeout, RequestException) as e:
+        st.error('**Dune query did not complete:** ' + str(e))
+        st.stop()
+
+    if view.pools.empty:
+        st.write('**Address is invalid.**')
+        st.write('If the address should be working DM me on [Twitter](https://twitter.com/0xKofi) so I can find a fix')
+        st.stop()
+
+    pooltable = view.pooltable
+    # a rerun on the same result (e.g. a row click) skips straight to the selection
+    if built:
+        # optional query taking comma separated "Pool Addresses", fetches many pools per execution.
+        # IDs are strings like those in sudovision.queries, TOML may give a bare number
+        batch_query_id = st.secrets.get("EARNINGS_BATCH_QUERY")
+        prefetch_earnings(prefetcher, dune, EARNINGS_QUERY, view.by_volume,
+                          batch_query_id=str(batch_query_id) if batch_query_id else None,
+                          batch_size=int(st.secrets.get("EARNINGS_BATCH_SIZE", 100)),
+                          # without the batched query every pool is a paid execution, so only the busiest are prefetched
+                          limit=int(st.secrets.get("PREFETCH_LIMIT", 20)))
+
+    if rollups:
+        with stage("rollups", rows=len(view.pools)):
+            show_rollups(view.rollups)
+
+    # large tables are paged server side instead of shipping every row to the browser
+    paged = len(pooltable) > int(st.secrets.get("GRID_PAGING_THRESHOLD", 500))
+    with stage("grid", rows=len(pooltable), paged=paged):
+        if paged:
+            selection = paged_table(pooltable, height=grid_height, page_size=int(st.secrets.get("GRID_PAGE_SIZE", 100)))
+        else:
+            selection = aggrid_interactive_table(df=decode_addresses(pooltable), height=grid_height)
+
+    st.write("**Select a row to see pool specific stats:**")
+    if selection["selected_rows"]:
+        address = selection["selected_rows"][0]["Pool Address"]
+        stats = view.details(address)
+
+        try:
+            with stage("earnings_query", query_id=EARNINGS_QUERY):
+                earnings = build_earnings(fetch_earnings(prefetcher, dune, EARNINGS_QUERY, address))
+        except (QueryFailed, QueryTimeout, RequestException) as e:
+            st.error('**Dune query did not complete:** ' + str(e))
+            st.stop()
+
+        st.write('')
+        st.write('**Pool Earnings Over Time**')
+        st.bar_chart(data=earnings, y='Fees Earned (ETH)', x='Day')
+
+        show_pool_stats(stats)
+
+
+def render_batch(dune, pools_query, param_name, label):
+    """
+    Renders the batch mode: looks up many addresses concurrently, showing the
+    per-address totals as lookups complete, then the combined pools table
+    with CSV exports.
+    """
+
+    text = st.text_area(label + 'es, one per line or comma separated', '')
+    upload = st.file_uploader('Or upload a CSV/TXT file of addresses', type=['csv', 'txt'])
+    if upload is not None:
+        text += '\n' + upload.getvalue().decode('utf-8', errors='ignore')
+    addresses = parse_addresses(text)
+    if addresses and st.button('Analyze %d addresses' % len(addresses)):
+        st.session_state['batch_addresses'] = addresses
+    # kept in the session so the download buttons' reruns keep the results on screen
+    if not addresses or st.session_state.get('batch_addresses') != addresses:
+        return
+
+    progress = st.progress(0.0)
+    summary_slot = st.empty()
+    pools_by_address = {}
+    failed = []
+    for done, (address, outcome) in enumerate(run_batch(
+            dune, pools_query, param_name, addresses,
+            max_workers=int(st.secrets.get("BATCH_WORKERS", 4))), start=1):
+        if isinstance(outcome, Exception):
+            failed.append((address, str(outcome)))
+        else:
+            pools_by_address[address] = outcome
+        progress.progress(done / len(addresses))
+        combined = combine(pools_by_address)
+        summary_slot.dataframe(summarize(combined))
+
+    if failed:
+        st.error('**Lookups that did not complete:** ' + ', '.join(address + ' (' + error + ')' for address, error in failed))
+
+    st.write('**All pools**')
+    st.dataframe(combined)
+    st.download_button('Download pools CSV', combined.to_csv(index=False), 'pools.csv', 'text/csv')
+    st.download_button('Download totals CSV', summarize(combined).to_csv(), 'totals.csv', 'text/csv')
+
+
+def timing_panel(timings, dune):
+    """
+    Writes the stage timings and counters of this run, the scheduler metrics
+    and the latest events of the whole process, such as background prefetches.
+    """
+
+    with st.expander('Timings', expanded=True):
+        st.write('**Total:** ' + "{:.3f}".format(timings.total()) + 's')
+        if timings.events:
+            st.dataframe(pd.DataFrame(timings.events))
+        if timings.counters:
+            st.write(dict(timings.counters))
+        st.write(dune.scheduler.metrics())
+        st.write('**Recent events, all sessions and workers**')
+        st.dataframe(pd.DataFrame(recent()))
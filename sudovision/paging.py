@@ -0,0 +1,44 @@
+import math
+
+import numpy as np
+
+
+def filter_frame(df, text):
+    """
+    Takes in a DataFrame and a search string.
+    Returns the rows where any text column contains the string, ignoring case.
+    """
+
+    if not text:
+        return df
+    text = text.lower()
+    mask = np.zeros(len(df), dtype=bool)
+    for column in df.columns:
+        if df[column].dtype.kind in 'biufcmM':
+            continue
+        mask |= df[column].astype(str).str.lower().str.contains(text, regex=False).to_numpy()
+    return df[mask]
+
+
+def page_frame(df, page, page_size, sort_by=None, ascending=False, text=None):
+    """
+    Takes in a DataFrame, a 1-based page number, the page size and optional
+    sort column, direction and search string.
+    Filters and sorts server side and slices out the requested page, so only
+    `page_size` rows are ever sent to the browser.
+    Returns the page DataFrame, the number of matching rows and the number of pages.
+    """
+
+    matching = filter_frame(df, text)
+    total = len(matching)
+    pages = max(1, math.ceil(total / page_size))
+    page = min(max(1, page), pages)
+    start = (page - 1) * page_size
+    if sort_by:
+        if matching[sort_by].dtype.kind in 'iuf':
+            # only the rows up to the end of the page need to be in order
+            pick = matching.nsmallest if ascending else matching.nlargest
+            matching = pick(start + page_size, sort_by)
+        else:
+            matching = matching.sort_values(sort_by, ascending=ascending, kind='stable')
+    return matching.iloc[start:start + page_size], total, pages
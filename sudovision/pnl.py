@@ -0,0 +1,75 @@
+import numpy as np
+
+from sudovision.valuation import sell_value
+
+
+def pnl_arrays(eth_balance, nft_balance, initial_eth, initial_nfts,
+               trading_eth, trading_nfts, spot_price, lp_fees, delta, exponential):
+    """
+    Takes in float arrays of pool balances, initial deposits, inventory
+    change by trading, spot price, LP fees and delta, and a bool array of
+    which pools have an exponential bonding curve.
+    Returns a dict of arrays with the manual inventory changes, current
+    inventory value, inventory value if held, real profit/loss and
+    impermanent loss of every pool. NFTs are valued by selling them one by
+    one along the pool's bonding curve from the current spot price.
+    """
+
+    def nft_value(count):
+        return sell_value(count, spot_price, delta, exponential)
+
+    manual_eth = eth_balance - initial_eth - trading_eth
+    manual_nfts = nft_balance - initial_nfts - trading_nfts
+
+    # so that withdrawals are included in current inventory
+    withdrawn_eth = np.where(manual_eth < 0, manual_eth, 0.0)
+    withdrawn_nfts = np.where(manual_nfts < 0, manual_nfts, 0.0)
+    current = eth_balance - withdrawn_eth + nft_value(nft_balance - withdrawn_nfts)
+
+    # so that additional deposits are included in inventory you could have just held
+    added_eth = np.where(manual_eth > 0, manual_eth, 0.0)
+    added_nfts = np.where(manual_nfts > 0, manual_nfts, 0.0)
+    held = initial_eth + added_eth + nft_value(initial_nfts + added_nfts)
+
+    real_pnl = current - held
+
+    return {
+        'Manual Inventory Change (ETH)': manual_eth,
+        'Manual Inventory Change (NFTs)': manual_nfts,
+        'Current Inventory Value': current,
+        'Inventory Value If Held': held,
+        'Real Profit/Loss': real_pnl,
+        'Impermanent Loss': real_pnl - lp_fees,
+    }
+
+
+def _floats(pools, name):
+    return pools[name].to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def compute_pnl(pools):
+    """
+    Takes in the renamed pools DataFrame.
+    Adds the inventory and profit/loss columns, computed on whole columns at once
+    Returns the DataFrame
+    """
+
+    columns = pnl_arrays(
+        _floats(pools, 'ETH Balance'),
+        _floats(pools, 'NFT Balance'),
+        _floats(pools, 'Initial ETH'),
+        _floats(pools, 'Initial NFTs'),
+        _floats(pools, 'Inventory Change By Trading (ETH)'),
+        _floats(pools, 'Inventory Change By Trading (NFTs)'),
+        _floats(pools, 'Spot Price'),
+        _floats(pools, 'LP Fees Earned (ETH)'),
+        _floats(pools, 'Delta'),
+        (pools['Bonding Curve'].astype(str).str.lower() == 'exponential').to_numpy(),
+    )
+    # NFT counts stay whole numbers when the inputs were
+    nft_dtypes = pools[['NFT Balance', 'Initial NFTs', 'Inventory Change By Trading (NFTs)']].dtypes
+    if all(dtype.kind in 'iu' for dtype in nft_dtypes):
+        columns['Manual Inventory Change (NFTs)'] = columns['Manual Inventory Change (NFTs)'].astype(np.int64)
+    for name, values in columns.items():
+        pools[name] = values
+    return pools
@@ -0,0 +1,65 @@
+import random
+import time
+
+COMPLETED_STATES = ('QUERY_STATE_COMPLETED', 'QUERY_STATE_COMPLETED_PARTIAL')
+FAILED_STATES = ('QUERY_STATE_FAILED', 'QUERY_STATE_CANCELLED', 'QUERY_STATE_EXPIRED')
+
+
+class QueryFailed(Exception):
+    """
+    Raised when an execution ends in a failed, cancelled or expired state.
+    """
+
+    def __init__(self, state):
+        super().__init__("Query execution ended in state " + state)
+        self.state = state
+
+    def __reduce__(self):
+        # rebuilt from the state when it crosses a process boundary
+        return QueryFailed, (self.state,)
+
+
+class QueryTimeout(Exception):
+    """
+    Raised when an execution does not finish before the polling deadline.
+    """
+
+
+def backoff_delays(initial=0.1, maximum=5.0, factor=2.0, jitter=0.2):
+    """
+    Yields sleep intervals that start at `initial` seconds and grow by `factor`
+    up to `maximum`, each randomised by +/- `jitter` so that sessions waiting
+    on the same execution do not poll in lockstep.
+    """
+
+    delay = initial
+    while True:
+        yield delay * random.uniform(1 - jitter, 1 + jitter)
+        delay = min(delay * factor, maximum)
+
+
+def wait_for_execution(get_state, cancel=None, timeout=300, **backoff):
+    """
+    Takes in a function returning the current state of an execution and an
+    optional function that cancels it.
+    Polls with exponential backoff until the execution completes.
+    Returns the number of status polls made. Raises QueryFailed on a failed
+    state and QueryTimeout, after cancelling the execution, once `timeout`
+    seconds pass.
+    """
+
+    deadline = time.monotonic() + timeout
+    polls = 0
+    for delay in backoff_delays(**backoff):
+        state = get_state()
+        polls += 1
+        if state in COMPLETED_STATES:
+            return polls
+        if state in FAILED_STATES:
+            raise QueryFailed(state)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            if cancel is not None:
+                cancel()
+            raise QueryTimeout("Query execution did not finish within %s seconds" % timeout)
+        time.sleep(min(delay, remaining))
@@ -0,0 +1,228 @@
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from sudovision.cache import ResultCache
+from sudovision.pnl import compute_pnl
+from sudovision.rollups import build_rollups
+
+POOL_COLUMNS = {'pool_address': 'Pool Address'
+    , 'nft_contract_address' : 'NFT Contract'
+    , 'name':'Name'
+    , 'pool_fee_volume_eth': 'LP Fees Earned (ETH)'
+    , 'eth_balance': 'ETH Balance'
+    , 'nft_balance': 'NFT Balance'
+    , 'eth_volume': 'Trading Volume (ETH)'
+    , 'usd_volume': 'Trading Volume (USD)'
+    , 'nfts_traded': 'NFTs Traded'
+    , 'spot_price': 'Spot Price'
+    , 'delta': 'Delta'
+    , 'bonding_curve': 'Bonding Curve'
+    , 'pool_type': 'Pool Type'
+
+    , 'initial_eth_balance': 'Initial ETH'
+    , 'initial_nft_balance': 'Initial NFTs'
+    , 'initial_spot_price': 'Initial Spot Price'
+    , 'creation_block_time': 'Creation Time'
+    , 'eth_change_trading': 'Inventory Change By Trading (ETH)'
+    , 'nft_change_trading': 'Inventory Change By Trading (NFTs)'}
+
+# compact dtypes for cached pools results. Columns that feed the P&L math stay
+# float64, display-only amounts and counts are narrowed, addresses are 42 bytes
+POOL_SCHEMA = {
+    'pool_address': 'S42',
+    'nft_contract_address': 'category',
+    'name': 'category',
+    'pool_type': 'category',
+    'bonding_curve': 'category',
+    'eth_volume': 'float32',
+    'usd_volume': 'float32',
+    'initial_spot_price': 'float32',
+    'nfts_traded': 'int32',
+    'nft_balance': 'int32',
+    'initial_nft_balance': 'int32',
+    'nft_change_trading': 'int32',
+}
+
+POOLTABLE_COLUMNS = ['Name',
+            'LP Fees Earned (ETH)',
+            'ETH Balance',
+            'NFT Balance',
+            'Trading Volume (ETH)',
+            'Trading Volume (USD)',
+            'Pool Address',
+            'NFTs Traded',
+            'Spot Price',
+            'Delta',
+            'Pool Type',
+            'Bonding Curve']
+
+POOLDETAILS_COLUMNS = ['Name',
+            'Pool Address',
+            'Real Profit/Loss',
+            'Impermanent Loss',
+
+            'Trading Volume (ETH)',
+            'LP Fees Earned (ETH)',
+
+            'ETH Balance',
+            'NFT Balance',
+            'Spot Price',
+
+            'Initial ETH',
+            'Initial NFTs',
+            'Initial Spot Price',
+
+            'Manual Inventory Change (ETH)',
+            'Manual Inventory Change (NFTs)',
+
+            'Inventory Change By Trading (ETH)',
+            'Inventory Change By Trading (NFTs)',
+
+            'Age',
+            'Current Inventory Value',
+            'Inventory Value If Held',
+            'Pool Type'
+            ]
+
+
+def to_day(column):
+    """
+    Takes in a column of timestamps, either typed or as Dune strings.
+    Returns the column as timezone naive dates
+    """
+
+    if column.dtype == object:
+        return pd.to_datetime(column.str[:10])
+    if column.dt.tz is not None:
+        column = column.dt.tz_localize(None)
+    return column.dt.normalize()
+
+
+def build_pools(result):
+    """
+    Takes in the result DataFrame of a pools query.
+    Renames the columns and adds the profit/loss and age columns
+    Returns a new pools DataFrame, the cached result is left untouched
+    """
+
+    if result.empty:
+        return result
+
+    pools = result.rename(columns=POOL_COLUMNS)
+
+    compute_pnl(pools)
+
+    pools['Creation Time'] = to_day(pools['Creation Time'])
+    pools['Age'] = pd.to_datetime("now") - pools['Creation Time']
+
+    return pools
+
+
+def decode_addresses(frame):
+    """
+    Returns the frame with a bytes `Pool Address` column turned back into
+    strings for display and lookups.
+    """
+
+    if frame['Pool Address'].dtype.kind != 'S':
+        return frame
+    return frame.assign(**{'Pool Address': frame['Pool Address'].str.decode('ascii')})
+
+
+class PoolView:
+    """
+    The derived frames of one pools result: the full pools frame, the grid
+    and details projections, a sorted lookup of pools by `Pool Address` and,
+    once first asked for, the rollups.
+
+    Views are cached, so `Pool Address` stays in the compact bytes layout of
+    the result. Callers decode only what they show, and `details` and
+    `by_volume` return strings.
+    """
+
+    def __init__(self, result):
+        self.result = result
+        self.pools = build_pools(result)
+        if self.pools.empty:
+            self.pooltable = self.pooldetails = self.pools
+            self._by_address = np.arange(0)
+            return
+        self.pooltable = self.pools[POOLTABLE_COLUMNS]
+        self.pooldetails = self.pools[POOLDETAILS_COLUMNS]
+        # pandas cannot index on bytes, row numbers in address order do the same job
+        self._by_address = np.argsort(self.pooldetails['Pool Address'].to_numpy(), kind='stable')
+
+    @property
+    def by_volume(self):
+        """
+        Returns the pool addresses as strings, busiest pools first as they
+        are the most likely to be clicked.
+        """
+
+        if self.pools.empty:
+            return []
+        busiest = self.pooltable.sort_values('Trading Volume (ETH)', ascending=False)[['Pool Address']]
+        return decode_addresses(busiest)['Pool Address'].tolist()
+
+    @cached_property
+    def rollups(self):
+        """
+        Returns the totals, by bonding curve and by pool type rollups and the
+        top pools of this result, grouped once and kept with the view.
+        """
+
+        rollups = build_rollups(self.pools)
+        rollups['top_pools'] = decode_addresses(rollups['top_pools'])
+        return rollups
+
+    def details(self, address):
+        """
+        Takes in a pool address string.
+        Returns the pooldetails rows of one pool with a fresh 0-based index
+        and a string `Pool Address`.
+        """
+
+        if self.pooldetails.empty:
+            return self.pooldetails.reset_index(drop=True)
+        addresses = self.pooldetails['Pool Address'].to_numpy()
+        if addresses.dtype.kind == 'S':
+            address = address.encode('ascii')
+        first, last = (np.searchsorted(addresses, address, side=side, sorter=self._by_address)
+                       for side in ('left', 'right'))
+        rows = self.pooldetails.iloc[self._by_address[first:last]]
+        return decode_addresses(rows.reset_index(drop=True))
+
+
+# derived frames are only kept while their result is, so no expiry of their own
+pool_views = ResultCache(ttl=None, maxsize=64)
+
+
+def get_pool_view(query_id, params, result):
+    """
+    Takes in a pools query ID, its parameters and the current result.
+    Returns (view, built): the memoized PoolView for this result, built only
+    if the result changed since the last call, and whether it was built now.
+    """
+
+    view = pool_views.get(query_id, params)
+    if view is not None and view.result is result:
+        return view, False
+    view = PoolView(result)
+    pool_views.set(query_id, params, view)
+    return view, True
+
+
+def build_earnings(result):
+    """
+    Takes in the result DataFrame of the daily earnings query.
+    Returns a DataFrame of fees earned per day
+    """
+
+    if result.empty:
+        result = pd.DataFrame(columns=['day', 'daily_fees'])
+    earnings = result[['day', 'daily_fees']].rename(columns={'daily_fees': 'Fees Earned (ETH)', 'day' : 'Day'})
+    earnings['Day'] = to_day(earnings['Day'])
+
+    return earnings
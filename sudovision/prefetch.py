@@ -0,0 +1,104 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from sudovision.cache import make_key, results_cache
+from sudovision.scheduler import BACKGROUND, INTERACTIVE, priority
+
+
+class Prefetcher:
+    """
+    Runs queries ahead of time on a bounded pool of worker threads.
+
+    Results land in the results cache. While a prefetch is running, `result`
+    waits for it instead of starting a second execution.
+    """
+
+    def __init__(self, max_workers=4):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def submit(self, client, query_id, params, run=None):
+        """
+        Queues a query unless it is already cached or queued. `run` replaces
+        client.run_query as the function called with (query ID, parameters).
+        """
+
+        run = run or client.run_query
+        self.submit_group(query_id, [params], lambda todo: run(query_id, todo[0]))
+
+    def submit_all(self, client, query_id, param_list, run=None):
+        for params in param_list:
+            self.submit(client, query_id, params, run)
+
+    def submit_group(self, query_id, param_list, fn):
+        """
+        Queues one call to `fn` that is expected to fill the results cache for
+        every parameter dict in `param_list`. `fn` is called with only the
+        parameters that are not already cached or queued.
+        """
+
+        with self._lock:
+            todo = [params for params in param_list
+                    if make_key(query_id, params) not in self._pending
+                    and results_cache.get(query_id, params) is None]
+            if not todo:
+                return
+            future = self._executor.submit(self._background, fn, todo)
+            keys = [make_key(query_id, params) for params in todo]
+            for key in keys:
+                self._pending[key] = (future, len(keys))
+        future.add_done_callback(lambda f: self._done(keys))
+
+    @staticmethod
+    def _background(fn, todo):
+        # prefetches queue behind interactive lookups in the scheduler
+        with priority(BACKGROUND):
+            return fn(todo)
+
+    def _done(self, keys):
+        with self._lock:
+            for key in keys:
+                self._pending.pop(key, None)
+
+    def result(self, client, query_id, params, run=None):
+        """
+        Returns the result for this query, waiting on a running prefetch if
+        there is one and running the query directly in the interactive lane
+        otherwise, with `run` in place of client.run_query if given.
+        """
+
+        with self._lock:
+            future, size = self._pending.get(make_key(query_id, params), (None, 0))
+        # a prefetch that has not started yet is not waited for, so the click does
+        # not queue behind it. A single one is dropped, a batch still runs for its other pools
+        if future is not None and not future.running() and not future.done():
+            if size == 1:
+                future.cancel()
+            future = None
+        if future is not None:
+            try:
+                future.result()
+            except Exception:
+                pass  # a failed prefetch is simply retried below
+            frame = results_cache.get(query_id, params)
+            if frame is not None:
+                return frame
+        with priority(INTERACTIVE):
+            return (run or client.run_query)(query_id, params)
+
+
+_prefetchers = {}
+_prefetchers_lock = threading.Lock()
+
+
+def get_prefetcher(max_workers=4):
+    """
+    Returns the process wide Prefetcher with this many workers, so every
+    session and rerun shares one bounded pool.
+    """
+
+    with _prefetchers_lock:
+        if max_workers not in _prefetchers:
+            _prefetchers[max_workers] = Prefetcher(max_workers=max_workers)
+        return _prefetchers[max_workers]
@@ -0,0 +1,7 @@
+"""
+Dune queries used by the app, as (query ID, address parameter name).
+"""
+
+OWNER_POOLS = ('1362901', 'Creator Address')
+COLLECTION_POOLS = ('1393519', 'NFT Contract Address')
+EARNINGS = ('1392569', 'Pool Address')
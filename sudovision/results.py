@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+
+from sudovision.timing import stage
+
+FLOAT_TYPES = ('double', 'real', 'float', 'decimal', 'uint256', 'int256')
+INT_TYPES = ('bigint', 'integer', 'int', 'smallint', 'tinyint')
+
+
+def _base_type(column_type):
+    return column_type.lower().split('(')[0].strip()
+
+
+def typed_column(values, column_type):
+    """
+    Takes in a list of JSON values and the Dune type of their column.
+    Returns a Series with a matching dtype: float64 for decimals, int64 for
+    integers without nulls, datetime64 for timestamps and dates, object otherwise.
+    """
+
+    base = _base_type(column_type)
+    if base in FLOAT_TYPES:
+        return pd.Series(values, dtype=np.float64)
+    if base in INT_TYPES:
+        series = pd.Series(values, dtype=np.float64)
+        return series.astype(np.int64) if not series.isna().any() else series
+    if base.startswith('timestamp') or base == 'date':
+        series = pd.Series(values, dtype=object)
+        return pd.to_datetime(series.str.replace(' UTC', '', regex=False), utc=True, format='ISO8601')
+    if base == 'boolean':
+        return pd.Series(values, dtype=object).astype('boolean')
+    return pd.Series(values, dtype=object)
+
+
+def frame_from_result(result):
+    """
+    Takes in the `result` object of a results response.
+    Builds a DataFrame column by column using the metadata column types, so
+    no list of row dicts is kept and no dtype is inferred
+    Returns the DataFrame
+    """
+
+    rows = result.get('rows', [])
+    metadata = result.get('metadata') or {}
+    names = metadata.get('column_names')
+    types = metadata.get('column_types')
+    if not names or not types:
+        return pd.DataFrame(rows)
+    return pd.DataFrame({
+        name: typed_column([row.get(name) for row in rows], column_type)
+        for name, column_type in zip(names, types)
+    })
+
+
+def read_pages(fetch_page, page_size):
+    """
+    Takes in a function fetching one page of results given (offset, limit)
+    and returning the parsed response JSON, and the page size.
+    Fetches pages until `next_offset` runs out, turning each into a typed
+    DataFrame before the next one is requested.
+    Returns the concatenated DataFrame and the JSON of the first page.
+    """
+
+    first = fetch_page(0, page_size)
+    with stage("frame_build", rows=len(first['result'].get('rows', []))):
+        frames = [frame_from_result(first['result'])]
+    next_offset = first.get('next_offset')
+    while next_offset:
+        page = fetch_page(next_offset, page_size)
+        with stage("frame_build", rows=len(page['result'].get('rows', []))):
+            frames.append(frame_from_result(page['result']))
+        next_offset = page.get('next_offset')
+    frame = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+    return frame, first
+
+
+def apply_schema(frame, schema):
+    """
+    Takes in a result DataFrame and a dict of column name to dtype.
+    Casts the listed columns that are present, e.g. to categoricals, float32
+    or fixed-width bytes ("S42"). Integer casts are skipped for columns with
+    nulls and bytes columns store nulls as empty bytes.
+    Returns the DataFrame
+    """
+
+    casts = {}
+    for name, dtype in schema.items():
+        if name not in frame.columns or frame[name].dtype == dtype:
+            continue
+        column = frame[name]
+        kind = np.dtype(dtype).kind if dtype != 'category' else 'O'
+        if kind in 'iu' and column.isna().any():
+            continue
+        if kind == 'S':
+            frame[name] = column.fillna('')
+        casts[name] = dtype
+    return frame.astype(casts) if casts else frame
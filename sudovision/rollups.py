@@ -0,0 +1,46 @@
+SUMMARY_COLUMNS = {
+    'Pool Address': 'count',
+    'LP Fees Earned (ETH)': 'sum',
+    'Trading Volume (ETH)': 'sum',
+    'Real Profit/Loss': 'sum',
+    'Impermanent Loss': 'sum',
+    'ETH Balance': 'sum',
+    'NFT Balance': 'sum',
+}
+
+TOP_POOL_COLUMNS = ['Name',
+            'Pool Address',
+            'LP Fees Earned (ETH)',
+            'Trading Volume (ETH)',
+            'Real Profit/Loss',
+            'Bonding Curve',
+            'Pool Type']
+
+
+def summarize_by(pools, column):
+    """
+    Takes in a pools DataFrame and the column to group it by.
+    Returns pool count, fees, volume, P&L and balance totals per group,
+    largest fees first.
+    """
+
+    # observed=True keeps categorical columns from adding empty groups
+    summary = pools.groupby(column, sort=False, observed=True).agg(SUMMARY_COLUMNS)
+    return summary.rename(columns={'Pool Address': 'Pools'}).sort_values('LP Fees Earned (ETH)', ascending=False)
+
+
+def build_rollups(pools, top=10):
+    """
+    Takes in the pools DataFrame of one result with its profit/loss columns.
+    Returns a dict of the collection wide totals, the totals by bonding
+    curve and by pool type, and the `top` pools by LP fees.
+    """
+
+    totals = pools.agg(SUMMARY_COLUMNS).rename({'Pool Address': 'Pools'})
+
+    return {
+        'totals': totals,
+        'by_curve': summarize_by(pools, 'Bonding Curve'),
+        'by_type': summarize_by(pools, 'Pool Type'),
+        'top_pools': pools.nlargest(top, 'LP Fees Earned (ETH)')[TOP_POOL_COLUMNS].reset_index(drop=True),
+    }
@@ -0,0 +1,183 @@
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+
+INTERACTIVE = 0
+BACKGROUND = 1
+LANES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+_priority = contextvars.ContextVar("priority", default=INTERACTIVE)
+
+
+@contextmanager
+def priority(lane):
+    """
+    Runs the enclosed API calls in the given lane. The lane follows the
+    context into asyncio.to_thread workers.
+    """
+
+    token = _priority.set(lane)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class _PriorityGate:
+    """
+    Hands out permits to waiters in priority order, FIFO within a lane.
+    `ready(lane)` and `take` decide whether a permit is free for the lane and
+    consume it; `retry_in` is how long to sleep before checking again.
+    """
+
+    def __init__(self, ready, take, retry_in=None):
+        self._ready = ready
+        self._take = take
+        self._retry_in = retry_in
+        self._cond = threading.Condition()
+        self._waiters = []
+        self._seq = itertools.count()
+
+    def acquire(self, lane):
+        with self._cond:
+            me = (lane, next(self._seq))
+            heapq.heappush(self._waiters, me)
+            while not (self._waiters[0] == me and self._ready(lane)):
+                self._cond.wait(self._retry_in() if self._retry_in else None)
+            heapq.heappop(self._waiters)
+            self._take()
+            self._cond.notify_all()
+
+    def release(self, give_back):
+        with self._cond:
+            give_back()
+            self._cond.notify_all()
+
+    def depth(self):
+        with self._cond:
+            depth = {name: 0 for name in LANES.values()}
+            for lane, _ in self._waiters:
+                depth[LANES[lane]] += 1
+            return depth
+
+
+class Scheduler:
+    """
+    Process wide gate in front of the Dune API.
+
+    Every HTTP call takes a token from a bucket refilled at `rate` per second
+    (up to `burst`), and at most `max_executions` query executions run at
+    once. Waiters in the interactive lane always go before the background
+    lane, and background executions leave `reserved` slots free (when there
+    is more than one slot), so a row click never waits for a prefetch to
+    finish. Queue depth and wait times per lane are available from `metrics`.
+    """
+
+    def __init__(self, rate=5.0, burst=10, max_executions=3, reserved=1):
+        self.rate = rate
+        self.burst = burst
+        self.max_executions = max_executions
+        self.background_executions = max(1, max_executions - reserved)
+        self._tokens = float(burst)
+        self._refilled = time.monotonic()
+        self._running = 0
+        self._stats_lock = threading.Lock()
+        self._waits = {
+            (kind, name): {"count": 0, "total": 0.0, "max": 0.0}
+            for kind in ("request", "execution") for name in LANES.values()
+        }
+        self._requests = _PriorityGate(self._has_token, self._take_token, self._next_token_in)
+        self._executions = _PriorityGate(self._has_slot, self._start_execution)
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+
+    def _has_slot(self, lane):
+        limit = self.background_executions if lane == BACKGROUND else self.max_executions
+        return self._running < limit
+
+    def _has_token(self, lane):
+        self._refill()
+        return self._tokens >= 1
+
+    def _take_token(self):
+        self._tokens -= 1
+
+    def _next_token_in(self):
+        return max((1 - self._tokens) / self.rate, 0.001)
+
+    def _start_execution(self):
+        self._running += 1
+
+    def _end_execution(self):
+        self._running -= 1
+
+    def _record(self, kind, lane, waited):
+        with self._stats_lock:
+            stats = self._waits[(kind, LANES[lane])]
+            stats["count"] += 1
+            stats["total"] += waited
+            stats["max"] = max(stats["max"], waited)
+
+    def request(self):
+        """
+        Blocks until the current lane may make one API call.
+        """
+
+        lane = _priority.get()
+        start = time.monotonic()
+        self._requests.acquire(lane)
+        self._record("request", lane, time.monotonic() - start)
+
+    def acquire_execution(self):
+        """
+        Blocks until the current lane may start an execution.
+        """
+
+        lane = _priority.get()
+        start = time.monotonic()
+        self._executions.acquire(lane)
+        self._record("execution", lane, time.monotonic() - start)
+
+    def release_execution(self):
+        self._executions.release(self._end_execution)
+
+    @contextmanager
+    def execution(self):
+        """
+        Holds one of the execution slots for the enclosed execute and poll.
+        """
+
+        self.acquire_execution()
+        try:
+            yield
+        finally:
+            self.release_execution()
+
+    def metrics(self):
+        """
+        Returns a dict with the requests and executions waiting per lane, the
+        executions running and the wait time count/mean/max in seconds per
+        kind ("request" or "execution") and lane.
+        """
+
+        with self._stats_lock:
+            waits = {
+                kind + " " + name: {
+                    "count": stats["count"],
+                    "mean": stats["total"] / stats["count"] if stats["count"] else 0.0,
+                    "max": stats["max"],
+                }
+                for (kind, name), stats in self._waits.items()
+            }
+        return {
+            "requests_waiting": self._requests.depth(),
+            "executions_waiting": self._executions.depth(),
+            "executions_running": self._running,
+            "wait_seconds": waits,
+        }
@@ -0,0 +1,61 @@
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """
+    Registry of in-flight work keyed by (query ID, parameters).
+
+    The first caller for a key runs the work; callers arriving while it runs
+    wait for and share its result (or exception) instead of repeating it.
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def claim(self, key):
+        """
+        Returns (future, leader). The leader must run the work and pass its
+        outcome to `finish`; everyone else waits on the future.
+        """
+
+        with self._lock:
+            future = self._flights.get(key)
+            if future is not None:
+                return future, False
+            future = Future()
+            self._flights[key] = future
+            return future, True
+
+    def finish(self, key, future, result=None, error=None):
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+        with self._lock:
+            self._flights.pop(key, None)
+
+    def do(self, key, fn):
+        """
+        Runs `fn` unless the same key is already in flight, in which case its
+        result is awaited and returned.
+        """
+
+        future, leader = self.claim(key)
+        if not leader:
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            self.finish(key, future, error=e)
+            raise
+        self.finish(key, future, result)
+        return result
+
+    def __len__(self):
+        return len(self._flights)
+
+
+# module level so every session and page in the process shares it
+inflight = SingleFlight()
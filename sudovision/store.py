@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+from sudovision.cache import write_atomic
+
+try:
+    import pyarrow as pa
+except ImportError:  # the snapshot store is optional
+    pa = None
+
+
+class SnapshotStore:
+    """
+    On-disk store of completed query results as Arrow IPC files.
+
+    Snapshots live under `<path>/<query ID>/<parameters hash>/` as one
+    `<execution ID>.arrow` file per execution plus a `latest.json` pointing
+    at the newest one. Files are read through a memory map, so the Arrow
+    buffers come straight from the page cache and any Streamlit process or
+    restart can reuse results fetched by another, even offline. Only the
+    newest `keep` snapshots of each query and parameters are kept, the one
+    before the latest so a reader that just read the old `latest.json` can
+    still open it.
+    """
+
+    def __init__(self, path, keep=2):
+        if pa is None:
+            raise ImportError("pyarrow is required for the snapshot store")
+        self.path = path
+        self.keep = max(1, keep)
+
+    def _dir(self, query_id, params):
+        digest = hashlib.sha1(json.dumps(params or {}, sort_keys=True).encode()).hexdigest()
+        return os.path.join(self.path, str(query_id), digest)
+
+    def _file(self, query_id, params, execution_id):
+        return os.path.join(self._dir(query_id, params), execution_id + ".arrow")
+
+    def save(self, query_id, params, execution_id, frame, ended_at=None):
+        """
+        Writes a result DataFrame for this query, parameters and execution and
+        marks it as the latest snapshot. `ended_at` defaults to now.
+        """
+
+        directory = self._dir(query_id, params)
+        os.makedirs(directory, exist_ok=True)
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        target = self._file(query_id, params, execution_id)
+
+        def write_table(path):
+            with pa.OSFile(path, "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+
+        write_atomic(target, write_table)
+
+        latest = {
+            "execution_id": execution_id,
+            "ended_at": str(pd.Timestamp(ended_at) if ended_at else pd.Timestamp.now(tz='UTC')),
+        }
+
+        def write_latest(path):
+            with open(path, "w") as f:
+                json.dump(latest, f)
+
+        write_atomic(os.path.join(directory, "latest.json"), write_latest)
+        self._prune(directory, target)
+
+    def _prune(self, directory, latest):
+        """
+        Deletes all but the newest `keep` snapshots in a directory, never the latest.
+        """
+
+        paths = [os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".arrow")]
+        older = [path for path in paths if path != latest]
+        older.sort(key=_mtime, reverse=True)
+        for path in older[self.keep - 1:]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass  # already removed by another process
+
+    def latest(self, query_id, params):
+        """
+        Returns the (execution ID, ended at timestamp) of the newest snapshot
+        for this query and parameters, or None if there is none.
+        """
+
+        try:
+            with open(os.path.join(self._dir(query_id, params), "latest.json")) as f:
+                latest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return latest["execution_id"], pd.Timestamp(latest["ended_at"])
+
+    def load(self, query_id, params, execution_id=None):
+        """
+        Takes in a query ID, its parameters and optionally an execution ID,
+        defaulting to the newest snapshot.
+        Returns the stored DataFrame, or None if there is no such snapshot.
+        """
+
+        if execution_id is None:
+            latest = self.latest(query_id, params)
+            if latest is None:
+                return None
+            execution_id = latest[0]
+        target = self._file(query_id, params, execution_id)
+        if not os.path.exists(target):
+            return None
+        with pa.memory_map(target, "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+        return table.to_pandas()
+
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return 0
@@ -0,0 +1,94 @@
+import contextvars
+import json
+import logging
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+
+logger = logging.getLogger("sudovision.timing")
+
+# the most recent events of the whole process, including prefetch workers outside
+# any trace, shown in the timing panel
+recent_events = deque(maxlen=500)
+_recent_lock = threading.Lock()
+
+_trace = contextvars.ContextVar("trace", default=None)
+
+
+class Trace:
+    """
+    Stage timings and counters collected while rendering one page.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.events = []
+        self.counters = Counter()
+        self.started = time.perf_counter()
+
+    def total(self):
+        return time.perf_counter() - self.started
+
+
+@contextmanager
+def trace(name):
+    """
+    Collects every stage and counter recorded in this context, including in
+    asyncio.to_thread workers, into a new Trace.
+    """
+
+    current = Trace(name)
+    token = _trace.set(current)
+    try:
+        yield current
+    finally:
+        _trace.reset(token)
+        record("total", current.total(), trace=name)
+
+
+def record(stage_name, seconds, **fields):
+    """
+    Records one finished stage to the log, the recent events and the current trace.
+    """
+
+    event = dict(stage=stage_name, seconds=round(seconds, 6), **fields)
+    logger.info(json.dumps(event, default=str))
+    with _recent_lock:
+        recent_events.append(event)
+    current = _trace.get()
+    if current is not None:
+        current.events.append(event)
+
+
+@contextmanager
+def stage(stage_name, **fields):
+    """
+    Times the enclosed block as one stage. Extra fields, and any set on the
+    yielded dict inside the block, are recorded with it.
+    """
+
+    start = time.perf_counter()
+    try:
+        yield fields
+    finally:
+        record(stage_name, time.perf_counter() - start, **fields)
+
+
+def count(name, n=1):
+    """
+    Adds to a counter of the current trace, e.g. cache hits or status polls.
+    """
+
+    current = _trace.get()
+    if current is not None:
+        current.counters[name] += n
+
+
+def recent(n=100):
+    """
+    Returns a copy of the last `n` events recorded anywhere in the process, newest last.
+    """
+
+    with _recent_lock:
+        return list(recent_events)[-n:]
@@ -0,0 +1,60 @@
+import numpy as np
+
+# deltas are ETH amounts (linear) or multipliers around 1 (exponential), anything
+# larger is still in wei
+WEI = 1e18
+WEI_THRESHOLD = 1e3
+
+
+def normalize_delta(delta):
+    """
+    Takes in an array of pool deltas.
+    Returns them in ETH or as plain multipliers, scaling down any given in wei
+    """
+
+    return np.where(np.abs(delta) > WEI_THRESHOLD, delta / WEI, delta)
+
+
+def linear_sell_value(count, spot_price, delta):
+    """
+    Takes in arrays of NFT counts, spot prices and linear deltas.
+    Returns what selling that many NFTs into each pool would pay: the spot
+    price, then the spot price less one delta per NFT already sold, stopping
+    once the price reaches zero.
+    """
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # number of sales before the price hits zero, every sale when delta is 0
+        priced = np.where(delta > 0, np.floor(spot_price / delta) + 1, np.inf)
+    sold = np.minimum(count, priced)
+    return sold * spot_price - delta * sold * (sold - 1) / 2
+
+
+def exponential_sell_value(count, spot_price, delta):
+    """
+    Takes in arrays of NFT counts, spot prices and exponential deltas.
+    Returns what selling that many NFTs into each pool would pay: the spot
+    price, then the spot price divided by delta once per NFT already sold.
+    """
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        # geometric series spot * (1 + 1/delta + ... + 1/delta^(count-1))
+        value = spot_price * (1 - delta ** -count) / (1 - 1 / delta)
+    return np.where(delta > 1, value, count * spot_price)
+
+
+def sell_value(count, spot_price, delta, exponential):
+    """
+    Takes in arrays of NFT counts, spot prices, deltas (in ETH, wei or as
+    multipliers) and whether each pool has an exponential bonding curve.
+    Returns the value of selling the NFTs one after another along each
+    pool's bonding curve, for all pools at once.
+    """
+
+    count = np.maximum(count, 0)
+    delta = normalize_delta(delta)
+    return np.where(
+        exponential,
+        exponential_sell_value(count, spot_price, delta),
+        linear_sell_value(count, spot_price, delta),
+    )